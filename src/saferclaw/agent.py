@@ -1,59 +1,92 @@
 from __future__ import annotations
 
+import os
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any
 
 from .executor import SafeExecutor
 from .llm import LLMClient, ToolRequest, default_tool_schemas
+from .policy import SecurityViolation
 
 
 class AgentError(RuntimeError):
     """Raised when the safe agent cannot execute a model tool request."""
 
 
+_EPHEMERAL_CACHE = {"type": "ephemeral"}
+
+
 class SafeAgent:
     """Run model-produced tool calls through SafeExecutor."""
 
+    _INSTRUCTIONS = (
+        "You are a safe local execution agent. "
+        "You can only execute allowed local tools listed below."
+    )
+    # Only added when run_plan is not offered, so the prompt never argues
+    # with the tool list.
+    _PARALLEL_HINT = (
+        " Issue multiple tool calls in parallel rather than a single run_plan; "
+        "each call is isolated."
+    )
+
     def __init__(
         self,
         executor: SafeExecutor,
         llm_client: LLMClient,
         workspace_context: str = "",
+        max_workers: int | None = None,
     ):
         self.executor = executor
         self.llm = llm_client
         self.workspace_context = workspace_context.strip()
+        allow_run_plan = executor.config.allow_run_plan
+        self.tools = default_tool_schemas(allow_run_plan=allow_run_plan)
+        instructions = self._INSTRUCTIONS
+        if not allow_run_plan:
+            instructions += self._PARALLEL_HINT
+        # Static prompt blocks come first and carry a cache breakpoint so providers
+        # with prompt caching (Anthropic) can reuse the prefix across calls.
+        self._system_blocks = [
+            {"type": "text", "text": instructions},
+            {
+                "type": "text",
+                "text": f"Allowed tools: {', '.join(tool['name'] for tool in self.tools)}.",
+                "cache_control": _EPHEMERAL_CACHE,
+            },
+        ]
+        self._workspace_blocks = (
+            [
+                {
+                    "type": "text",
+                    "text": f"Workspace profile:\n\n{self.workspace_context}",
+                    "cache_control": _EPHEMERAL_CACHE,
+                }
+            ]
+            if self.workspace_context
+            else None
+        )
+        if max_workers is None:
+            max_workers = _env_int("TOOL_CONCURRENCY_LIMIT", executor.max_workers)
+        self.max_workers = max(1, max_workers)
 
     def run(self, prompt: str, cwd: str | None = None, max_turns: int = 1) -> dict[str, Any]:
         if not prompt.strip():
             raise AgentError("Prompt is empty")
 
-        messages = [
-            {
-                "role": "system",
-                "content": (
-                    "You are a safe local execution agent. "
-                    "You can only execute allowed local tools listed below."
-                ),
-            },
-            {"role": "system", "content": "Allowed tools: run_command, read_file, write_file, run_plan."},
+        messages: list[dict[str, Any]] = [
+            {"role": "system", "content": self._system_blocks},
         ]
-        if self.workspace_context:
-            messages.append(
-                {
-                    "role": "system",
-                    "content": f"Workspace profile:\n\n{self.workspace_context}",
-                }
-            )
+        if self._workspace_blocks:
+            messages.append({"role": "system", "content": self._workspace_blocks})
+        # Dynamic content goes last so the cached prefix stays identical.
         messages.append({"role": "user", "content": prompt})
 
-        response = self.llm.complete(messages, default_tool_schemas(), max_turns=max_turns)
-        tool_outputs = []
+        response = self.llm.complete(messages, self.tools, max_turns=max_turns)
+        tool_outputs = self._execute_tools(response.tool_calls, cwd=cwd)
         status = "ok"
-        for tool in response.tool_calls:
-            output = self._execute_tool(tool, cwd=cwd)
-            tool_outputs.append(output)
-            if output.get("status") in {"failed", "blocked"}:
-                status = "failed"
+        if any(output.get("status") in {"failed", "blocked"} for output in tool_outputs):
+            status = "failed"
 
         return {
             "status": status,
@@ -63,6 +96,23 @@ class SafeAgent:
             "tool_outputs": tool_outputs,
         }
 
+    def _execute_tools(self, tools: list[ToolRequest], cwd: str | None) -> list[dict[str, Any]]:
+        workers = min(self.max_workers, len(tools))
+        if workers <= 1 or not self.executor.can_run_concurrently(workers):
+            return [self._execute_tool_in_slot(tool, cwd) for tool in tools]
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(self._execute_tool_in_slot, tools, [cwd] * len(tools)))
+
+    def _execute_tool_in_slot(self, tool: ToolRequest, cwd: str | None) -> dict[str, Any]:
+        # A failing call is reported in place so its siblings' results are kept,
+        # whether the calls run one by one or on the pool.
+        try:
+            return self._execute_tool(tool, cwd=cwd)
+        except SecurityViolation as err:
+            return _tool_error(tool, "blocked", err)
+        except Exception as err:
+            return _tool_error(tool, "failed", err)
+
     @staticmethod
     def _tool_to_dict(tool: ToolRequest) -> dict[str, Any]:
         return {"name": tool.name, "arguments": tool.arguments}
@@ -95,6 +145,22 @@ class SafeAgent:
             return {
                 "status": "ok",
                 "kind": "run_plan",
-                "results": self.executor.execute_plan(raw_steps, cwd=cwd),
+                "results": self.executor.execute_plan(
+                    raw_steps, cwd=cwd, parallel=bool(args.get("parallel"))
+                ),
             }
         raise AgentError(f"Unknown tool: {name}")
+
+
+def _tool_error(tool: ToolRequest, status: str, err: Exception) -> dict[str, Any]:
+    return {
+        "status": status,
+        "kind": "tool_call",
+        "tool": tool.name,
+        "error": str(err),
+    }
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name, "").strip()
+    return int(value) if value.isdigit() else default
@@ -1,22 +1,26 @@
 from __future__ import annotations
 
 import argparse
+import functools
 import json
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any, Callable
 from dataclasses import asdict
 
-from .config import load_config, write_default_config
+from . import jsonutil
+from .config import SafetyConfig, load_config, write_default_config
 from .executor import SafeExecutor
-from .agent import AgentError, SafeAgent
-from .llm import AnthropicHTTPClient, LLMError, OpenAIHTTPClient
 from .policy import SecurityViolation
-from .queue import Job, QueueManager
-from .workspace import workspace_context_text
+
+if TYPE_CHECKING:
+    from .llm import HTTPSession
+    from .queue import Job
+
+_dumps_indent = functools.partial(json.dumps, indent=2)
 
 
 def _load_plan(path: str) -> list[dict[str, Any]]:
-    data = json.loads(Path(path).read_text(encoding="utf-8"))
+    data = jsonutil.loads(Path(path).read_bytes())
     if isinstance(data, dict) and isinstance(data.get("steps"), list):
         return data["steps"]
     if isinstance(data, list):
@@ -35,7 +39,18 @@ def _load_json_payload(payload: str) -> dict[str, Any]:
     return raw
 
 
-def _to_llm_client(args: Any, config: Any):
+@functools.lru_cache(maxsize=1)
+def _llm_session() -> HTTPSession:
+    """One keep-alive HTTP session per CLI process, shared by every LLM client."""
+    from .llm import HTTPSession
+
+    return HTTPSession()
+
+
+def _to_llm_client(args: Any, config: Any, session: HTTPSession | None = None):
+    from .llm import AnthropicHTTPClient, OpenAIHTTPClient
+
+    session = session or _llm_session()
     provider = (args.provider or config.llm_provider).strip().lower()
     model = args.model or config.llm_model
     if provider == "openai":
@@ -46,6 +61,8 @@ def _to_llm_client(args: Any, config: Any):
         return OpenAIHTTPClient(
             model=model or default_model,
             api_key_env=args.api_key_env or config.llm_api_key_env or default_env,
+            session=session,
+            cache_dir=config.llm_cache_dir,
         )
     provider = "anthropic" if provider == "auto" else provider
     default_env = "ANTHROPIC_API_KEY"
@@ -53,6 +70,8 @@ def _to_llm_client(args: Any, config: Any):
     return AnthropicHTTPClient(
         model=model or config.llm_model or default_model,
         api_key_env=args.api_key_env or config.llm_api_key_env or default_env,
+        session=session,
+        cache_dir=config.llm_cache_dir,
     )
 
 
@@ -84,137 +103,326 @@ def _run_job(kind: str, payload: Any, executor: SafeExecutor, cwd: str | None =
         return executor.write_file(path, str(content), cwd=cwd)
 
     if kind == "plan":
+        parallel = False
         if isinstance(payload, list):
             steps = payload
         else:
             steps = payload.get("steps")
+            parallel = bool(payload.get("parallel"))
         if not isinstance(steps, list):
             raise ValueError("plan job requires list in 'steps'")
-        return {"status": "ok", "kind": "plan", "results": executor.execute_plan(steps, cwd=cwd)}
+        return {
+            "status": "ok",
+            "kind": "plan",
+            "results": executor.execute_plan(steps, cwd=cwd, parallel=parallel),
+        }
 
     raise ValueError(f"Unknown job kind: {kind}")
 
 
-def build_parser() -> argparse.ArgumentParser:
-    parser = argparse.ArgumentParser(
-        prog="saferclaw",
-        description="Small, safe local agent for controlled command/file execution.",
-    )
-    parser.add_argument(
-        "--config",
-        default=None,
-        help="Path to JSON config file (default built-in policy).",
-    )
-    parser.add_argument(
-        "--dry-run",
-        action="store_true",
-        help="Show what would run without executing commands or modifying files.",
-    )
-    parser.add_argument(
-        "--yes",
-        action="store_true",
-        help="Skip all confirmation prompts.",
-    )
-    parser.add_argument(
-        "--cwd",
-        default=None,
-        help="Optional working directory for command execution.",
-    )
+def _cmd_init_config(args: argparse.Namespace, config: SafetyConfig, executor: SafeExecutor) -> int:
+    write_default_config(args.path)
+    print(f"Wrote config template to {args.path}")
+    return 0
 
-    subcommands = parser.add_subparsers(dest="command", required=True)
 
-    init_cmd = subcommands.add_parser(
-        "init-config", help="Write a default config file."
+def _cmd_run(args: argparse.Namespace, config: SafetyConfig, executor: SafeExecutor) -> int:
+    command = " ".join(args.command_line)
+    result = executor.run_command(command, cwd=args.cwd)
+    print(_dumps_indent(result))
+    return 0 if result.get("status") in {"ok", "dry_run", "skipped"} else 1
+
+
+def _cmd_run_plan(args: argparse.Namespace, config: SafetyConfig, executor: SafeExecutor) -> int:
+    steps = _load_plan(args.plan)
+    results = executor.execute_plan(steps, cwd=args.cwd, parallel=args.parallel)
+    print(_dumps_indent(results))
+    failed = [r for r in results if r.get("status") in {"failed", "blocked"}]
+    return 0 if not failed else 1
+
+
+def _cmd_run_llm(args: argparse.Namespace, config: SafetyConfig, executor: SafeExecutor) -> int:
+    from .agent import AgentError, SafeAgent
+    from .llm import LLMError
+    from .workspace import workspace_context_text
+
+    if not config.llm_enabled and args.provider == "auto":
+        config.llm_enabled = True
+    workspace_context = workspace_context_text(args.workspace)
+    try:
+        llm = _to_llm_client(args, config)
+        agent = SafeAgent(executor, llm, workspace_context=workspace_context)
+        result = agent.run(
+            " ".join(args.prompt),
+            cwd=args.cwd,
+            max_turns=args.max_turns or config.llm_max_turns,
+        )
+        print(_dumps_indent(result))
+        return 0
+    except (LLMError, SecurityViolation, ValueError, AgentError, FileNotFoundError) as err:
+        print(_dumps_indent({"status": "failed", "error": str(err)}))
+        return 1
+
+
+def _cmd_queue_enqueue(args: argparse.Namespace, config: SafetyConfig, executor: SafeExecutor) -> int:
+    from .queue import QueueManager
+
+    payload = _load_json_payload(args.payload)
+    manager = QueueManager(args.db or config.state_db_path)
+    job_id = manager.enqueue(args.kind, payload, max_attempts=args.max_attempts)
+    manager.close()
+    print(_dumps_indent({"status": "queued", "job_id": job_id}))
+    return 0
+
+
+def _cmd_queue_list(args: argparse.Namespace, config: SafetyConfig, executor: SafeExecutor) -> int:
+    from .queue import QueueManager
+
+    manager = QueueManager(args.db or config.state_db_path)
+    jobs = [_job_to_dict(item) for item in manager.list_jobs(args.status, limit=args.limit)]
+    manager.close()
+    print(_dumps_indent(jobs))
+    return 0
+
+
+def _cmd_queue_run_next(args: argparse.Namespace, config: SafetyConfig, executor: SafeExecutor) -> int:
+    from .queue import QueueManager
+
+    manager = QueueManager(args.db or config.state_db_path)
+    job = manager.claim_next()
+    if job is None:
+        manager.close()
+        print(_dumps_indent({"status": "idle", "jobs": 0}))
+        return 0
+
+    try:
+        output = _run_job(job.kind, job.payload, executor, cwd=args.cwd)
+        manager.mark_done(job.id, output)
+        manager.close()
+        print(_dumps_indent({"status": "done", "job_id": job.id, "output": output}))
+        return 0 if output.get("status") == "ok" else 1
+    except SecurityViolation as err:
+        manager.mark_blocked(job.id, str(err))
+        manager.close()
+        print(_dumps_indent({"status": "blocked", "job_id": job.id, "error": str(err)}))
+        return 1
+    except Exception as err:
+        manager.mark_failed(job.id, str(err), retryable=True)
+        manager.close()
+        print(_dumps_indent({"status": "failed", "job_id": job.id, "error": str(err)}))
+        return 1
+
+
+def _cmd_queue_drain(args: argparse.Namespace, config: SafetyConfig, executor: SafeExecutor) -> int:
+    import asyncio
+
+    from .queue import QueueManager
+
+    workers = max(1, args.parallel)
+    if not executor.can_run_concurrently(workers):
+        workers = 1
+
+    def handler(job: Job) -> dict[str, Any]:
+        return _run_job(job.kind, job.payload, executor, cwd=args.cwd)
+
+    with QueueManager(args.db or config.state_db_path) as manager:
+        outcomes = asyncio.run(
+            manager.run_workers(handler, concurrency=workers, max_jobs=args.max_jobs)
+        )
+
+    counts = {"done": 0, "blocked": 0, "failed": 0}
+    for outcome in outcomes:
+        counts[outcome["status"]] += 1
+    print(_dumps_indent({"status": "drained", "jobs": len(outcomes), **counts, "results": outcomes}))
+    ok = all(
+        outcome["status"] == "done" and outcome["output"].get("status") == "ok"
+        for outcome in outcomes
     )
-    init_cmd.add_argument(
+    return 0 if ok else 1
+
+
+def _add_init_config_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
         "--path",
         default=".saferclaw.config.json",
         help="Where to write the config file.",
     )
 
-    run_cmd = subcommands.add_parser(
-        "run", help="Run a single command or a shell-safe command string."
-    )
-    run_cmd.add_argument(
+
+def _add_run_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
         "command_line",
         nargs="+",
         help="Command to run, e.g. saferclaw run \"ls -la\"",
     )
 
-    plan_cmd = subcommands.add_parser(
-        "run-plan", help="Execute a JSON plan file with multiple steps."
-    )
-    plan_cmd.add_argument("plan", help="Path to plan JSON file.")
-    plan_cmd.add_argument(
+
+def _add_run_plan_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("plan", help="Path to plan JSON file.")
+    parser.add_argument(
         "--cwd",
         default=None,
         help="Optional working directory for command steps.",
     )
-
-    run_llm_cmd = subcommands.add_parser(
-        "run-llm", help="Generate and execute one safe action turn from an LLM."
+    parser.add_argument(
+        "--parallel",
+        action="store_true",
+        help="Treat all steps as independent when tool_concurrency > 1.",
     )
-    run_llm_cmd.add_argument("prompt", nargs="+", help="Prompt passed to the LLM.")
-    run_llm_cmd.add_argument(
+
+
+def _add_run_llm_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("prompt", nargs="+", help="Prompt passed to the LLM.")
+    parser.add_argument(
         "--provider",
         default="auto",
         choices=["auto", "anthropic", "openai"],
         help="LLM provider (default: auto using config).",
     )
-    run_llm_cmd.add_argument("--model", default=None, help="Model override.")
-    run_llm_cmd.add_argument("--api-key-env", default=None, help="Env var for provider key.")
-    run_llm_cmd.add_argument(
+    parser.add_argument("--model", default=None, help="Model override.")
+    parser.add_argument("--api-key-env", default=None, help="Env var for provider key.")
+    parser.add_argument(
         "--max-turns",
         type=int,
         default=None,
         help="Max turns/messages passed to provider.",
     )
-    run_llm_cmd.add_argument(
+    parser.add_argument(
         "--workspace",
         default=None,
         help="Path containing AGENTS.md and other SafeClaw markdown context files.",
     )
-    run_llm_cmd.add_argument(
+    parser.add_argument(
         "--cwd",
         default=None,
         help="Working directory for generated tool calls.",
     )
 
-    queue_enqueue_cmd = subcommands.add_parser("queue-enqueue", help="Enqueue a new safe job.")
-    queue_enqueue_cmd.add_argument("kind", help="Job kind: command | read_file | write_file | plan")
-    queue_enqueue_cmd.add_argument("--payload", required=True, help="JSON object or path to JSON file.")
-    queue_enqueue_cmd.add_argument(
+
+def _add_queue_enqueue_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("kind", help="Job kind: command | read_file | write_file | plan")
+    parser.add_argument("--payload", required=True, help="JSON object or path to JSON file.")
+    parser.add_argument(
         "--db",
         default=None,
         help="SQLite job database path (default from config).",
     )
-    queue_enqueue_cmd.add_argument(
+    parser.add_argument(
         "--max-attempts",
         type=int,
         default=3,
         help="Maximum retry attempts.",
     )
 
-    queue_list_cmd = subcommands.add_parser("queue-list", help="List queued jobs.")
-    queue_list_cmd.add_argument("--db", default=None, help="SQLite job database path.")
-    queue_list_cmd.add_argument("--status", default=None, help="Filter by status.")
-    queue_list_cmd.add_argument("--limit", type=int, default=50, help="Max rows.")
 
-    queue_run_cmd = subcommands.add_parser(
-        "queue-run-next",
-        help="Claim the oldest queued job and run it.",
-    )
-    queue_run_cmd.add_argument(
+def _add_queue_list_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--db", default=None, help="SQLite job database path.")
+    parser.add_argument("--status", default=None, help="Filter by status.")
+    parser.add_argument("--limit", type=int, default=50, help="Max rows.")
+
+
+def _add_queue_run_next_args(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
         "--db",
         default=None,
         help="SQLite job database path (default from config).",
     )
-    queue_run_cmd.add_argument(
+    parser.add_argument(
         "--cwd",
         default=None,
         help="Working directory for generated tool calls.",
     )
 
+
+def _add_queue_drain_args(parser: argparse.ArgumentParser) -> None:
+    _add_queue_run_next_args(parser)
+    parser.add_argument(
+        "--max-jobs",
+        type=int,
+        default=None,
+        help="Stop after this many jobs (default: until the queue is empty).",
+    )
+    parser.add_argument(
+        "--parallel",
+        type=int,
+        default=1,
+        help="Jobs to run at once; forced to 1 when confirmations are interactive.",
+    )
+
+
+Handler = Callable[[argparse.Namespace, SafetyConfig, SafeExecutor], int]
+
+# (name, help, argument setup, handler) for every subcommand, in --help order.
+SUBCOMMANDS: list[tuple[str, str, Callable[[argparse.ArgumentParser], None], Handler]] = [
+    ("init-config", "Write a default config file.", _add_init_config_args, _cmd_init_config),
+    (
+        "run",
+        "Run a single command or a shell-safe command string.",
+        _add_run_args,
+        _cmd_run,
+    ),
+    (
+        "run-plan",
+        "Execute a JSON plan file with multiple steps.",
+        _add_run_plan_args,
+        _cmd_run_plan,
+    ),
+    (
+        "run-llm",
+        "Generate and execute one safe action turn from an LLM.",
+        _add_run_llm_args,
+        _cmd_run_llm,
+    ),
+    ("queue-enqueue", "Enqueue a new safe job.", _add_queue_enqueue_args, _cmd_queue_enqueue),
+    ("queue-list", "List queued jobs.", _add_queue_list_args, _cmd_queue_list),
+    (
+        "queue-run-next",
+        "Claim the oldest queued job and run it.",
+        _add_queue_run_next_args,
+        _cmd_queue_run_next,
+    ),
+    (
+        "queue-drain",
+        "Run queued jobs until the queue is empty or --max-jobs is reached.",
+        _add_queue_drain_args,
+        _cmd_queue_drain,
+    ),
+]
+
+
+@functools.lru_cache(maxsize=1)
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="saferclaw",
+        description="Small, safe local agent for controlled command/file execution.",
+    )
+    parser.add_argument(
+        "--config",
+        default=None,
+        help="Path to JSON config file (default built-in policy).",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Show what would run without executing commands or modifying files.",
+    )
+    parser.add_argument(
+        "--yes",
+        action="store_true",
+        help="Skip all confirmation prompts.",
+    )
+    parser.add_argument(
+        "--cwd",
+        default=None,
+        help="Optional working directory for command execution.",
+    )
+
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    for name, help_text, add_arguments, handler in SUBCOMMANDS:
+        subparser = subcommands.add_parser(name, help=help_text)
+        subparser.set_defaults(func=handler)
+        add_arguments(subparser)
+
     return parser
 
 
@@ -222,90 +430,17 @@ def main(argv: list[str] | None = None) -> int:
     parser = build_parser()
     args = parser.parse_args(argv)
     config = load_config(args.config)
-    executor = SafeExecutor(
+    handler = getattr(args, "func", None)
+    if handler is None:
+        parser.print_help()
+        return 1
+
+    with SafeExecutor(
         config=config,
         dry_run=args.dry_run,
         auto_confirm=args.yes,
-    )
-
-    if args.command == "init-config":
-        write_default_config(args.path)
-        print(f"Wrote config template to {args.path}")
-        return 0
-
-    if args.command == "run":
-        command = " ".join(args.command_line)
-        result = executor.run_command(command, cwd=args.cwd)
-        print(json.dumps(result, indent=2))
-        return 0 if result.get("status") in {"ok", "dry_run", "skipped"} else 1
-
-    if args.command == "run-plan":
-        steps = _load_plan(args.plan)
-        results = executor.execute_plan(steps, cwd=args.cwd)
-        print(json.dumps(results, indent=2))
-        failed = [r for r in results if r.get("status") in {"failed", "blocked"}]
-        return 0 if not failed else 1
-
-    if args.command == "run-llm":
-        if not config.llm_enabled and args.provider == "auto":
-            config.llm_enabled = True
-        workspace_context = workspace_context_text(args.workspace)
-        try:
-            llm = _to_llm_client(args, config)
-            agent = SafeAgent(executor, llm, workspace_context=workspace_context)
-            result = agent.run(
-                " ".join(args.prompt),
-                cwd=args.cwd,
-                max_turns=args.max_turns or config.llm_max_turns,
-            )
-            print(json.dumps(result, indent=2))
-            return 0
-        except (LLMError, SecurityViolation, ValueError, AgentError, FileNotFoundError) as err:
-            print(json.dumps({"status": "failed", "error": str(err)}, indent=2))
-            return 1
-
-    if args.command == "queue-enqueue":
-        payload = _load_json_payload(args.payload)
-        manager = QueueManager(args.db or config.state_db_path)
-        job_id = manager.enqueue(args.kind, payload, max_attempts=args.max_attempts)
-        manager.close()
-        print(json.dumps({"status": "queued", "job_id": job_id}, indent=2))
-        return 0
-
-    if args.command == "queue-list":
-        manager = QueueManager(args.db or config.state_db_path)
-        jobs = [_job_to_dict(item) for item in manager.list_jobs(args.status, limit=args.limit)]
-        manager.close()
-        print(json.dumps(jobs, indent=2))
-        return 0
-
-    if args.command == "queue-run-next":
-        manager = QueueManager(args.db or config.state_db_path)
-        job = manager.claim_next()
-        if job is None:
-            manager.close()
-            print(json.dumps({"status": "idle", "jobs": 0}, indent=2))
-            return 0
-
-        try:
-            output = _run_job(job.kind, job.payload, executor, cwd=args.cwd)
-            manager.mark_done(job.id, json.dumps(output))
-            manager.close()
-            print(json.dumps({"status": "done", "job_id": job.id, "output": output}, indent=2))
-            return 0 if output.get("status") == "ok" else 1
-        except SecurityViolation as err:
-            manager.mark_blocked(job.id, str(err))
-            manager.close()
-            print(json.dumps({"status": "blocked", "job_id": job.id, "error": str(err)}, indent=2))
-            return 1
-        except Exception as err:
-            manager.mark_failed(job.id, str(err), retryable=True)
-            manager.close()
-            print(json.dumps({"status": "failed", "job_id": job.id, "error": str(err)}, indent=2))
-            return 1
-
-    parser.print_help()
-    return 1
+    ) as executor:
+        return handler(args, config, executor)
 
 
 if __name__ == "__main__":
@@ -6,31 +6,34 @@ from pathlib import Path
 from typing import Mapping
 
 
-DEFAULT_ALLOWED_COMMANDS = ["ls", "pwd", "find", "cat", "echo", "git"]
-DEFAULT_DENIED_COMMANDS = [
-    "curl",
-    "wget",
-    "ssh",
-    "nc",
-    "sudo",
-    "rm",
-    "rmdir",
-    "bash",
-    "sh",
-    "python",
-    "node",
-    "deno",
-]
+DEFAULT_ALLOWED_COMMANDS = frozenset({"ls", "pwd", "find", "cat", "echo", "git"})
+DEFAULT_DENIED_COMMANDS = frozenset(
+    {
+        "curl",
+        "wget",
+        "ssh",
+        "nc",
+        "sudo",
+        "rm",
+        "rmdir",
+        "bash",
+        "sh",
+        "python",
+        "node",
+        "deno",
+    }
+)
 
 
 @dataclass
 class SafetyConfig:
-    allowed_commands: set[str] = field(default_factory=lambda: set(DEFAULT_ALLOWED_COMMANDS))
-    denied_commands: set[str] = field(default_factory=lambda: set(DEFAULT_DENIED_COMMANDS))
+    allowed_commands: frozenset[str] | set[str] = DEFAULT_ALLOWED_COMMANDS
+    denied_commands: frozenset[str] | set[str] = DEFAULT_DENIED_COMMANDS
     allowed_roots: list[str] = field(default_factory=lambda: [str(Path(".").resolve())])
     require_confirmation: bool = True
     command_timeout_seconds: int = 10
     max_output_bytes: int = 12_000
+    tool_concurrency: int = 1
     audit_file: str = ".saferclaw.audit.jsonl"
     network_access: bool = False
     allowed_env: dict[str, str] = field(
@@ -42,6 +45,12 @@ class SafetyConfig:
     llm_model: str | None = None
     llm_api_key_env: str | None = None
     llm_max_turns: int = 1
+    llm_cache_dir: str | None = None
+    allow_run_plan: bool = False
+
+    def __post_init__(self) -> None:
+        # Resolved once per config; replace the config to change allowed_roots.
+        self.resolved_roots = tuple(Path(root).resolve() for root in self.allowed_roots)
 
     def dump(self) -> str:
         payload = asdict(self)
@@ -50,11 +59,13 @@ class SafetyConfig:
         return json.dumps(payload, indent=2)
 
 
-def _coerce_set(value: object) -> set[str]:
+def _coerce_set(value: object) -> frozenset[str]:
     if value is None:
-        return set()
-    if isinstance(value, list):
-        return set(str(item).strip().lower() for item in value if str(item).strip())
+        return frozenset()
+    if isinstance(value, frozenset):
+        return value
+    if isinstance(value, (list, set)):
+        return frozenset(text for text in (str(item).strip().lower() for item in value) if text)
     raise ValueError("Expected a list of strings")
 
 
@@ -113,12 +124,8 @@ def load_config(path: str | None = None) -> SafetyConfig:
     if not isinstance(raw, Mapping):
         raise ValueError("Config file must contain an object")
 
-    allowed_commands = _coerce_set(raw.get("allowed_commands")) or set(
-        DEFAULT_ALLOWED_COMMANDS
-    )
-    denied_commands = _coerce_set(raw.get("denied_commands")) or set(
-        DEFAULT_DENIED_COMMANDS
-    )
+    allowed_commands = _coerce_set(raw.get("allowed_commands")) or DEFAULT_ALLOWED_COMMANDS
+    denied_commands = _coerce_set(raw.get("denied_commands")) or DEFAULT_DENIED_COMMANDS
     allowed_roots = _coerce_list(raw.get("allowed_roots"))
     if not allowed_roots:
         allowed_roots = [str(Path(".").resolve())]
@@ -134,6 +141,7 @@ def load_config(path: str | None = None) -> SafetyConfig:
             raw.get("command_timeout_seconds"), SafetyConfig.command_timeout_seconds
         ),
         max_output_bytes=_coerce_int(raw.get("max_output_bytes"), SafetyConfig.max_output_bytes),
+        tool_concurrency=_coerce_int(raw.get("tool_concurrency"), SafetyConfig.tool_concurrency),
         audit_file=str(raw.get("audit_file") or SafetyConfig.audit_file),
         network_access=_coerce_bool(raw.get("network_access"), SafetyConfig.network_access),
         allowed_env=(
@@ -147,6 +155,8 @@ def load_config(path: str | None = None) -> SafetyConfig:
         llm_model=_coerce_optional_str(raw.get("llm_model")),
         llm_api_key_env=_coerce_optional_str(raw.get("llm_api_key_env")),
         llm_max_turns=_coerce_int(raw.get("llm_max_turns"), SafetyConfig.llm_max_turns),
+        llm_cache_dir=_coerce_optional_str(raw.get("llm_cache_dir")),
+        allow_run_plan=_coerce_bool(raw.get("allow_run_plan"), SafetyConfig.allow_run_plan),
     )
 
 
@@ -1,46 +1,191 @@
 from __future__ import annotations
 
-import json
+import os
+import selectors
 import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
+from typing import Any, BinaryIO, Iterator
 
+from . import jsonutil
 from .config import SafetyConfig
 from .policy import CommandPolicy, SecurityViolation
 
 
+# Checked in this order, so a step with several keys keeps its old precedence.
+_PLAN_KEYS = ("command", "read_file", "write_file")
+
+
+def _plan_key(step: Any) -> str | None:
+    if not isinstance(step, dict):
+        return None
+    return next((key for key in _PLAN_KEYS if key in step), None)
+
+
+def _is_read_only_step(step: Any) -> bool:
+    return _plan_key(step) == "read_file"
+
+
+def _plan_batches(steps: list[Any], parallel: bool) -> list[list[tuple[int, Any]]]:
+    """Group plan steps into batches whose members may run concurrently.
+
+    Consecutive ``read_file`` steps never depend on each other, so they share a
+    batch. Every other step is a barrier unless the whole plan is ``parallel``.
+    """
+    indexed = list(enumerate(steps, start=1))
+    if parallel:
+        return [indexed] if indexed else []
+    batches: list[list[tuple[int, Any]]] = []
+    for item in indexed:
+        if batches and _is_read_only_step(item[1]) and _is_read_only_step(batches[-1][-1][1]):
+            batches[-1].append(item)
+        else:
+            batches.append([item])
+    return batches
+
+
+_READ_CHUNK = 65536
+# How long arun_command waits for a killed child to be reaped.
+_KILL_GRACE_SECONDS = 0.1
+
+
+def _keep(buffer: bytearray, chunk: bytes, limit: int) -> None:
+    if len(buffer) < limit:
+        buffer += chunk[: limit - len(buffer)]
+
+
+async def _aread_capped(stream: Any, limit: int) -> bytes:
+    """Drain ``stream`` to EOF, keeping at most ``limit`` bytes."""
+    buffer = bytearray()
+    while True:
+        chunk = await stream.read(_READ_CHUNK)
+        if not chunk:
+            return bytes(buffer)
+        _keep(buffer, chunk, limit)
+
+
+def _write_file_args(payload: Any) -> tuple[Any, str]:
+    if not isinstance(payload, dict) or "path" not in payload or "content" not in payload:
+        raise ValueError("write_file step needs {path, content}")
+    return payload["path"], str(payload["content"])
+
+
+def _plan_action(step: Any) -> tuple[str, tuple[Any, ...]]:
+    if not isinstance(step, dict):
+        raise ValueError("Step is not an object")
+    key = _plan_key(step)
+    if key is None:
+        raise ValueError("Step missing command/read_file/write_file")
+    if key == "write_file":
+        return key, _write_file_args(step[key])
+    return key, (step[key],)
+
+
+def _step_error(index: int, status: str, err: Exception) -> dict[str, Any]:
+    return {
+        "status": status,
+        "kind": "plan_step",
+        "index": index,
+        "error": str(err),
+    }
+
+
 class SafeExecutor:
     def __init__(
         self,
         config: SafetyConfig,
         dry_run: bool = False,
         auto_confirm: bool = False,
+        max_workers: int | None = None,
     ):
         self.config = config
         self.policy = CommandPolicy(config)
         self.dry_run = dry_run
         self.auto_confirm = auto_confirm
+        # Computed once: prompts are decided by config and auto_confirm at construction.
+        self._needs_confirm = bool(config.require_confirmation and not auto_confirm)
         self.audit_path = Path(config.audit_file)
+        self._default_cwd: Path | None = None
+        self.max_workers = max(1, config.tool_concurrency if max_workers is None else max_workers)
+        self._audit_handle: BinaryIO | None = None
+        self._audit_lock = threading.Lock()
+        self._audit_batch_depth = 0
+
+    def __enter__(self) -> SafeExecutor:
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        with self._audit_lock:
+            if self._audit_handle is not None:
+                self._audit_handle.close()
+                self._audit_handle = None
 
-    def _truncate(self, value: str | None) -> str | None:
-        if value is None:
-            return None
-        if len(value) <= self.config.max_output_bytes:
-            return value
-        return value[: self.config.max_output_bytes] + "\n...[truncated]"
+    def can_run_concurrently(self, workers: int | None = None) -> bool:
+        """Whether tool calls may be dispatched from worker threads.
+
+        Interactive confirmation prompts must stay on the calling thread, so
+        concurrency is only used when no prompt can be shown. ``workers``
+        defaults to ``max_workers``.
+        """
+        workers = self.max_workers if workers is None else workers
+        return workers > 1 and not self._interactive()
+
+    def _interactive(self) -> bool:
+        return self._needs_confirm and not self.dry_run
+
+    def _truncate_bytes(self, data: bytes) -> bytes:
+        limit = self.config.max_output_bytes
+        if len(data) <= limit:
+            return data
+        return b"".join((memoryview(data)[:limit], b"\n...[truncated]"))
+
+    def _audit(self) -> BinaryIO:
+        if self._audit_handle is None:
+            self._audit_handle = self.audit_path.open("ab")
+        return self._audit_handle
 
     def _record(self, event: dict[str, Any]) -> None:
         event["timestamp_utc"] = datetime.now(timezone.utc).isoformat()
-        with self.audit_path.open("a", encoding="utf-8") as handle:
-            handle.write(json.dumps(event) + "\n")
+        line = jsonutil.dumps(event) + b"\n"
+        with self._audit_lock:
+            handle = self._audit()
+            handle.write(line)
+            if not self._audit_batch_depth:
+                handle.flush()
+
+    @contextmanager
+    def _audit_batch(self) -> Iterator[None]:
+        """Defer audit flushes until the outermost batch (e.g. a plan) ends."""
+        with self._audit_lock:
+            self._audit_batch_depth += 1
+        try:
+            yield
+        finally:
+            with self._audit_lock:
+                self._audit_batch_depth -= 1
+                if not self._audit_batch_depth and self._audit_handle is not None:
+                    self._audit_handle.flush()
 
     def _confirm(self, prompt: str) -> bool:
-        if self.auto_confirm:
+        if not self._needs_confirm:
             return True
         return input(f"{prompt} [y/N]: ").strip().lower() in {"y", "yes"}
 
-    def run_command(self, command: str | list[str], cwd: str | None = None) -> dict[str, Any]:
+    def _prepare_command(
+        self, command: str | list[str], cwd: str | None
+    ) -> tuple[list[str], Path | None, dict[str, Any] | None]:
+        """Validate a command and return ``(parts, cwd, result)``.
+
+        ``result`` is only set when the command must not run (dry run or
+        declined confirmation); it has already been recorded.
+        """
         parts = self.policy.validate_command(command)
         if self.dry_run:
             result = {
@@ -49,19 +194,20 @@ class SafeExecutor:
                 "command": parts,
             }
             self._record(result)
-            return result
-        actual_cwd = Path(cwd or ".").resolve()
-        self.policy.validate_path(actual_cwd)
-
-        for argument in parts[1:]:
-            if not isinstance(argument, str):
-                continue
-            if argument.startswith("-"):
-                continue
-            if any(token in argument for token in ("/", "../", "~")):
-                self.policy.validate_path(argument, base=actual_cwd)
-
-        if self.config.require_confirmation and not self.auto_confirm:
+            return parts, None, result
+        actual_cwd = self._command_cwd(cwd)
+
+        path_arguments = [
+            argument
+            for argument in parts[1:]
+            if isinstance(argument, str)
+            and not argument.startswith("-")
+            and ("/" in argument or "~" in argument)
+        ]
+        if path_arguments:
+            self.policy.validate_paths(path_arguments, base=actual_cwd)
+
+        if self._needs_confirm:
             if not self._confirm(f"Run command: {' '.join(parts)}"):
                 result = {
                     "status": "skipped",
@@ -70,31 +216,121 @@ class SafeExecutor:
                     "reason": "user_declined",
                 }
                 self._record(result)
-                return result
+                return parts, actual_cwd, result
+        return parts, actual_cwd, None
 
-        completed = subprocess.run(
-            parts,
-            cwd=actual_cwd,
-            env=self.config.allowed_env,
-            capture_output=True,
-            text=True,
-            timeout=self.config.command_timeout_seconds,
-        )
+    def _command_cwd(self, cwd: str | None) -> Path:
+        if cwd:
+            return self.policy.validate_path(cwd)
+        if self._default_cwd is None:
+            self._default_cwd = self.policy.validate_path(".")
+        return self._default_cwd
+
+    def _output_text(self, data: bytes) -> str:
+        # Decode only what is kept; the dropped tail never becomes a str.
+        return self._truncate_bytes(data).decode("utf-8", "replace")
 
+    def _command_result(
+        self, parts: list[str], returncode: int, stdout: bytes, stderr: bytes
+    ) -> dict[str, Any]:
         result = {
-            "status": "ok" if completed.returncode == 0 else "failed",
+            "status": "ok" if returncode == 0 else "failed",
             "kind": "command",
             "command": parts,
-            "returncode": completed.returncode,
-            "stdout": self._truncate(completed.stdout),
-            "stderr": self._truncate(completed.stderr),
+            "returncode": returncode,
+            "stdout": self._output_text(stdout),
+            "stderr": self._output_text(stderr),
         }
         self._record(result)
         return result
 
+    def _run_capped(self, parts: list[str], cwd: Path) -> tuple[int, bytes, bytes]:
+        """Run ``parts`` and return ``(returncode, stdout, stderr)``.
+
+        Both pipes are drained to EOF so the child never blocks, but only the
+        first ``max_output_bytes + 1`` bytes of each are kept in memory.
+        """
+        limit = self.config.max_output_bytes + 1
+        timeout = self.config.command_timeout_seconds
+        deadline = time.monotonic() + timeout
+        with subprocess.Popen(
+            parts,
+            cwd=cwd,
+            env=self.config.allowed_env,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        ) as process:
+            buffers = {process.stdout.fileno(): bytearray(), process.stderr.fileno(): bytearray()}
+            try:
+                with selectors.DefaultSelector() as selector:
+                    for fd in buffers:
+                        selector.register(fd, selectors.EVENT_READ)
+                    while selector.get_map():
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            raise subprocess.TimeoutExpired(parts, timeout)
+                        for key, _ in selector.select(remaining):
+                            chunk = os.read(key.fd, _READ_CHUNK)
+                            if chunk:
+                                _keep(buffers[key.fd], chunk, limit)
+                            else:
+                                selector.unregister(key.fd)
+                    returncode = process.wait(timeout=max(deadline - time.monotonic(), 0))
+            except subprocess.TimeoutExpired:
+                process.kill()
+                raise
+        stdout, stderr = buffers.values()
+        return returncode, bytes(stdout), bytes(stderr)
+
+    def run_command(self, command: str | list[str], cwd: str | None = None) -> dict[str, Any]:
+        parts, actual_cwd, result = self._prepare_command(command, cwd)
+        if result is not None:
+            return result
+
+        returncode, stdout, stderr = self._run_capped(parts, actual_cwd)
+        return self._command_result(parts, returncode, stdout, stderr)
+
+    async def arun_command(
+        self, command: str | list[str], cwd: str | None = None
+    ) -> dict[str, Any]:
+        import asyncio
+
+        parts, actual_cwd, result = self._prepare_command(command, cwd)
+        if result is not None:
+            return result
+
+        process = await asyncio.create_subprocess_exec(
+            *parts,
+            cwd=actual_cwd,
+            env=self.config.allowed_env,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        limit = self.config.max_output_bytes + 1
+        try:
+            stdout, stderr, returncode = await asyncio.wait_for(
+                asyncio.gather(
+                    _aread_capped(process.stdout, limit),
+                    _aread_capped(process.stderr, limit),
+                    process.wait(),
+                ),
+                timeout=self.config.command_timeout_seconds,
+            )
+        except asyncio.TimeoutError:
+            process.kill()
+            # Give the killed child a moment to be reaped, but no longer: a
+            # grandchild that inherited its pipes can keep them open (and
+            # process.wait() pending) long past the timeout.
+            try:
+                await asyncio.wait_for(process.wait(), timeout=_KILL_GRACE_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+            raise subprocess.TimeoutExpired(parts, self.config.command_timeout_seconds) from None
+        return self._command_result(parts, returncode, stdout, stderr)
+
     def read_file(self, path: str, cwd: str | None = None) -> dict[str, Any]:
         target = self.policy.validate_path(path, base=cwd)
-        if self.config.require_confirmation and not self.auto_confirm and not self.dry_run:
+        if self._needs_confirm and not self.dry_run:
             if not self._confirm(f"Read file: {target}"):
                 result = {
                     "status": "skipped",
@@ -110,19 +346,20 @@ class SafeExecutor:
             self._record(result)
             return result
 
-        content = target.read_text(encoding="utf-8")
+        with target.open("rb") as handle:
+            data = handle.read(self.config.max_output_bytes + 1)
         result = {
             "status": "ok",
             "kind": "read_file",
             "path": str(target),
-            "content": self._truncate(content),
+            "content": self._output_text(data),
         }
         self._record(result)
         return result
 
     def write_file(self, path: str, content: str, cwd: str | None = None) -> dict[str, Any]:
         target = self.policy.validate_path(path, base=cwd)
-        if self.config.require_confirmation and not self.auto_confirm and not self.dry_run:
+        if self._needs_confirm and not self.dry_run:
             if not self._confirm(f"Write file: {target}"):
                 result = {
                     "status": "skipped",
@@ -143,57 +380,100 @@ class SafeExecutor:
         self._record(result)
         return result
 
-    def execute_plan(self, steps: list[dict[str, Any]], cwd: str | None = None) -> list[dict[str, Any]]:
-        outputs = []
-        for index, step in enumerate(steps, start=1):
-            if not isinstance(step, dict):
-                outputs.append(
-                    {
-                        "status": "failed",
-                        "kind": "plan_step",
-                        "index": index,
-                        "error": "Step is not an object",
-                    }
-                )
-                continue
+    def execute_plan(
+        self,
+        steps: list[dict[str, Any]],
+        cwd: str | None = None,
+        parallel: bool = False,
+    ) -> list[dict[str, Any]]:
+        if not self.can_run_concurrently():
+            with self._audit_batch():
+                return [self._run_step(index, step, cwd) for index, step in enumerate(steps, start=1)]
 
-            try:
-                if "command" in step:
-                    outputs.append(self.run_command(step["command"], cwd=cwd))
-                elif "read_file" in step:
-                    outputs.append(self.read_file(step["read_file"], cwd=cwd))
-                elif "write_file" in step:
-                    payload = step["write_file"]
-                    if not isinstance(payload, dict) or "path" not in payload or "content" not in payload:
-                        raise ValueError("write_file step needs {path, content}")
-                    outputs.append(
-                        self.write_file(payload["path"], str(payload["content"]), cwd=cwd)
-                    )
-                else:
-                    outputs.append(
-                        {
-                            "status": "failed",
-                            "kind": "plan_step",
-                            "index": index,
-                            "error": "Step missing command/read_file/write_file",
-                        }
-                    )
-            except SecurityViolation as err:
-                outputs.append(
-                    {
-                        "status": "blocked",
-                        "kind": "plan_step",
-                        "index": index,
-                        "error": str(err),
-                    }
-                )
-            except Exception as err:
-                outputs.append(
-                    {
-                        "status": "failed",
-                        "kind": "plan_step",
-                        "index": index,
-                        "error": str(err),
-                    }
+        outputs: list[dict[str, Any]] = []
+        with self._audit_batch(), ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            for batch in _plan_batches(steps, parallel):
+                if len(batch) == 1:
+                    outputs.append(self._run_step(batch[0][0], batch[0][1], cwd))
+                    continue
+                outputs.extend(pool.map(lambda item: self._run_step(item[0], item[1], cwd), batch))
+        return outputs
+
+    def _run_step(self, index: int, step: Any, cwd: str | None) -> dict[str, Any]:
+        try:
+            action, args = _plan_action(step)
+            return getattr(self, self._PLAN_DISPATCH[action])(*args, cwd=cwd)
+        except SecurityViolation as err:
+            return _step_error(index, "blocked", err)
+        except Exception as err:
+            return _step_error(index, "failed", err)
+
+    async def aread_file(self, path: str, cwd: str | None = None) -> dict[str, Any]:
+        import asyncio
+
+        return await asyncio.to_thread(self.read_file, path, cwd)
+
+    async def awrite_file(self, path: str, content: str, cwd: str | None = None) -> dict[str, Any]:
+        import asyncio
+
+        return await asyncio.to_thread(self.write_file, path, content, cwd)
+
+    async def aexecute_plan(
+        self,
+        steps: list[dict[str, Any]],
+        cwd: str | None = None,
+        parallel: bool = False,
+    ) -> list[dict[str, Any]]:
+        """Async counterpart of :meth:`execute_plan`.
+
+        Steps inside one batch are gathered on the running event loop, at
+        most ``max_workers`` at a time. Without concurrency (the default
+        ``tool_concurrency`` of 1, or confirmation prompts enabled) every step
+        is awaited in order instead.
+        """
+        import asyncio
+
+        outputs: list[dict[str, Any]] = []
+        with self._audit_batch():
+            if not self.can_run_concurrently():
+                for index, step in enumerate(steps, start=1):
+                    outputs.append(await self._arun_step(index, step, cwd))
+                return outputs
+
+            semaphore = asyncio.Semaphore(self.max_workers)
+
+            async def run_limited(index: int, step: Any) -> dict[str, Any]:
+                async with semaphore:
+                    return await self._arun_step(index, step, cwd)
+
+            for batch in _plan_batches(steps, parallel):
+                if len(batch) == 1:
+                    index, step = batch[0]
+                    outputs.append(await self._arun_step(index, step, cwd))
+                    continue
+                outputs.extend(
+                    await asyncio.gather(*(run_limited(index, step) for index, step in batch))
                 )
         return outputs
+
+    async def _arun_step(self, index: int, step: Any, cwd: str | None) -> dict[str, Any]:
+        try:
+            action, args = _plan_action(step)
+            return await getattr(self, self._APLAN_DISPATCH[action])(*args, cwd=cwd)
+        except SecurityViolation as err:
+            return _step_error(index, "blocked", err)
+        except Exception as err:
+            return _step_error(index, "failed", err)
+
+    # Method names rather than functions, so subclass overrides and patched
+    # instance attributes are honoured.
+    _PLAN_DISPATCH = {
+        "command": "run_command",
+        "read_file": "read_file",
+        "write_file": "write_file",
+    }
+    _APLAN_DISPATCH = {
+        "command": "arun_command",
+        "read_file": "aread_file",
+        "write_file": "awrite_file",
+    }
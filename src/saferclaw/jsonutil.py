@@ -0,0 +1,22 @@
+"""Compact JSON encoding and decoding that use orjson when it is installed."""
+
+from __future__ import annotations
+
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # optional dependency, see the "fast" extra
+    orjson = None
+
+
+def _stdlib_dumps(value: Any) -> bytes:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+dumps = orjson.dumps if orjson is not None else _stdlib_dumps
+"""Serialize ``value`` to compact UTF-8 encoded JSON bytes."""
+
+loads = orjson.loads if orjson is not None else json.loads
+"""Parse JSON from ``bytes`` or ``str``; errors are ``ValueError`` subclasses."""
@@ -1,13 +1,24 @@
 from __future__ import annotations
 
+import abc
+import base64
+import functools
+import hashlib
+import http.client
 import json
 import os
 import ssl
-import urllib.error
+import tempfile
+import threading
+import urllib.parse
 import urllib.request
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from pathlib import Path
 from typing import Any, Protocol
 
+from . import jsonutil
+
 
 class LLMError(RuntimeError):
     """Raised when provider request/response cannot be processed."""
@@ -29,45 +40,295 @@ class LLMResponse:
 class LLMClient(Protocol):
     def complete(
         self,
-        messages: list[dict[str, str]],
+        messages: list[dict[str, Any]],
         tools: list[dict[str, Any]],
         max_turns: int = 1,
     ) -> LLMResponse:
         ...
 
 
-class BaseLLMClient:
-    def __init__(self, api_url: str, api_key_env: str, timeout_sec: int = 30):
+@functools.lru_cache(maxsize=1)
+def _ssl_context() -> ssl.SSLContext:
+    # Loading the CA bundle is the expensive part; do it once per process.
+    return ssl.create_default_context()
+
+
+# (host, port, base64 credentials) of an HTTP proxy.
+_Proxy = tuple[str, int, str | None]
+# (scheme, host, port, proxy) identifies one pool of interchangeable sockets.
+_PoolKey = tuple[str, str, int | None, _Proxy | None]
+
+
+def _proxy_for(scheme: str, host: str) -> _Proxy | None:
+    """Proxy ``(host, port, credentials)`` for a request, like urllib picks it.
+
+    Reads ``HTTPS_PROXY`` / ``HTTP_PROXY`` and honours ``NO_PROXY`` through
+    :func:`urllib.request.getproxies` and :func:`urllib.request.proxy_bypass`.
+    """
+    proxy = urllib.request.getproxies().get(scheme)
+    if not proxy or urllib.request.proxy_bypass(host):
+        return None
+    if "://" not in proxy:
+        proxy = f"http://{proxy}"
+    parts = urllib.parse.urlsplit(proxy)
+    if parts.scheme != "http" or not parts.hostname:
+        raise LLMError(f"Unsupported {scheme} proxy: {proxy}")
+    credentials = None
+    if parts.username is not None:
+        user = urllib.parse.unquote(parts.username)
+        password = urllib.parse.unquote(parts.password or "")
+        credentials = base64.b64encode(f"{user}:{password}".encode()).decode("ascii")
+    return parts.hostname, parts.port or 80, credentials
+
+
+class HTTPSession:
+    """Pooled keep-alive HTTP(S) connections shared by LLM clients.
+
+    Reusing a connection skips the TCP and TLS handshake on every request after
+    the first. Each host keeps up to ``maxsize`` idle connections, so
+    concurrent requests to one host each get their own socket.
+
+    Proxies come from the environment as they do for urllib. HTTPS requests
+    are tunnelled through the proxy with ``CONNECT``; plain HTTP requests are
+    sent to it with an absolute URL. Redirects are not followed.
+    """
+
+    def __init__(self, maxsize: int = 16) -> None:
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._idle: dict[_PoolKey, list[http.client.HTTPConnection]] = {}
+
+    @staticmethod
+    def _connect(
+        scheme: str,
+        host: str,
+        port: int | None,
+        proxy: _Proxy | None,
+        timeout: float,
+    ) -> http.client.HTTPConnection:
+        if proxy is None:
+            if scheme == "https":
+                return http.client.HTTPSConnection(
+                    host, port, timeout=timeout, context=_ssl_context()
+                )
+            return http.client.HTTPConnection(host, port, timeout=timeout)
+        proxy_host, proxy_port, credentials = proxy
+        if scheme == "http":
+            return http.client.HTTPConnection(proxy_host, proxy_port, timeout=timeout)
+        connection = http.client.HTTPSConnection(
+            proxy_host, proxy_port, timeout=timeout, context=_ssl_context()
+        )
+        tunnel_headers = {"Proxy-Authorization": f"Basic {credentials}"} if credentials else None
+        connection.set_tunnel(host, port, headers=tunnel_headers)
+        return connection
+
+    def _acquire(self, key: _PoolKey) -> http.client.HTTPConnection | None:
+        with self._lock:
+            idle = self._idle.get(key)
+            return idle.pop() if idle else None
+
+    def _release(self, key: _PoolKey, connection: http.client.HTTPConnection) -> None:
+        if connection.sock is None:
+            return  # the server asked to close it
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.maxsize:
+                idle.append(connection)
+                return
+        connection.close()
+
+    def post(
+        self, url: str, body: bytes, headers: dict[str, str], timeout: float
+    ) -> tuple[int, bytes]:
+        parts = urllib.parse.urlsplit(url)
+        if parts.scheme not in {"http", "https"} or not parts.hostname:
+            raise LLMError(f"Unsupported LLM API URL: {url}")
+        path = parts.path or "/"
+        if parts.query:
+            path = f"{path}?{parts.query}"
+        proxy = _proxy_for(parts.scheme, parts.hostname)
+        if proxy is not None and parts.scheme == "http":
+            # A plain HTTP proxy takes the absolute URL instead of a tunnel.
+            path = urllib.parse.urlunsplit(parts._replace(fragment=""))
+            if proxy[2]:
+                headers = {**headers, "Proxy-Authorization": f"Basic {proxy[2]}"}
+        key = (parts.scheme, parts.hostname, parts.port, proxy)
+        connection = self._acquire(key)
+        if connection is None:
+            connection = self._connect(*key, timeout)
+            reused = False
+        else:
+            connection.sock.settimeout(timeout)
+            reused = True
+        try:
+            result = self._send(connection, path, body, headers)
+        except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+            if not reused:
+                raise
+            # The server closed the idle keep-alive socket; retry once on a fresh one.
+            connection = self._connect(*key, timeout)
+            result = self._send(connection, path, body, headers)
+        self._release(key, connection)
+        return result
+
+    @staticmethod
+    def _send(
+        connection: http.client.HTTPConnection, path: str, body: bytes, headers: dict[str, str]
+    ) -> tuple[int, bytes]:
+        try:
+            connection.request("POST", path, body=body, headers=headers)
+            response = connection.getresponse()
+            return response.status, response.read()
+        except BaseException:
+            connection.close()
+            raise
+
+    def close(self) -> None:
+        """Close every idle connection."""
+        with self._lock:
+            idle = [connection for pool in self._idle.values() for connection in pool]
+            self._idle.clear()
+        for connection in idle:
+            connection.close()
+
+
+class BaseLLMClient(abc.ABC):
+    def __init__(
+        self,
+        api_url: str,
+        api_key_env: str,
+        timeout_sec: int = 30,
+        session: HTTPSession | None = None,
+        max_concurrency: int = 32,
+        cache_dir: str | None = None,
+    ):
         self.api_url = api_url
         self.api_key_env = api_key_env
         self.timeout_sec = timeout_sec
+        self.session = session or HTTPSession()
+        self.max_concurrency = max(1, max_concurrency)
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self._tools_cache: tuple[list[dict[str, Any]], Any] | None = None
+
+    def _tool_payload(self, tools: list[dict[str, Any]]) -> Any:
+        """Provider-specific tool payload, rebuilt only when ``tools`` changes.
+
+        Callers reuse one tools list across turns, so the last list is kept
+        and compared by identity; mutating it in place is not detected.
+        """
+        cached = self._tools_cache
+        if cached is None or cached[0] is not tools:
+            cached = (tools, self._build_tool_payload(tools))
+            self._tools_cache = cached
+        return cached[1]
+
+    @abc.abstractmethod
+    def _build_tool_payload(self, tools: list[dict[str, Any]]) -> Any:
+        """Translate the shared tool schemas into the provider's format."""
+
+    @abc.abstractmethod
+    def complete(
+        self,
+        messages: list[dict[str, Any]],
+        tools: list[dict[str, Any]],
+        max_turns: int = 1,
+    ) -> LLMResponse:
+        """Send ``messages`` and return the provider's reply."""
+
+    async def acomplete_many(
+        self,
+        conversations: list[list[dict[str, Any]]],
+        tools: list[dict[str, Any]],
+        max_turns: int = 1,
+    ) -> list[LLMResponse | BaseException]:
+        """Complete independent conversations concurrently.
+
+        At most ``max_concurrency`` requests are in flight. Results keep the
+        input order; a failed request yields its exception instead of a
+        response.
+        """
+        import asyncio
+
+        if not conversations:
+            return []
+        loop = asyncio.get_running_loop()
+        # The pool size is the only limiter; extra requests queue inside it.
+        pool = ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(conversations)))
+        try:
+            results = await asyncio.gather(
+                *(
+                    loop.run_in_executor(pool, self.complete, messages, tools, max_turns)
+                    for messages in conversations
+                ),
+                return_exceptions=True,
+            )
+        except asyncio.CancelledError:
+            # Drop queued requests without waiting on the ones in flight, so
+            # cancelling never blocks the event loop.
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        pool.shutdown(wait=False)
+        return results
+
+    def complete_many(
+        self,
+        conversations: list[list[dict[str, Any]]],
+        tools: list[dict[str, Any]],
+        max_turns: int = 1,
+    ) -> list[LLMResponse | BaseException]:
+        """Blocking wrapper around :meth:`acomplete_many`."""
+        import asyncio
+
+        return asyncio.run(self.acomplete_many(conversations, tools, max_turns))
+
+    def _cache_path(self, payload: dict[str, Any]) -> Path | None:
+        if self.cache_dir is None:
+            return None
+        # Always the stdlib encoder, so keys do not change when orjson is installed.
+        canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"))
+        digest = hashlib.sha256(f"{self.api_url}\n{canonical}".encode("utf-8")).hexdigest()
+        return self.cache_dir / digest[:2] / f"{digest}.json"
+
+    @staticmethod
+    def _cache_store(path: Path, raw: bytes) -> None:
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+            with os.fdopen(fd, "wb") as handle:
+                handle.write(raw)
+            os.replace(tmp_name, path)
+        except OSError:
+            pass  # caching is best effort
 
     def _http_post(self, payload: dict[str, Any]) -> dict[str, Any]:
+        cache_path = self._cache_path(payload)
+        if cache_path is not None:
+            try:
+                return jsonutil.loads(cache_path.read_bytes())
+            except (OSError, ValueError):
+                pass
+
         key = os.getenv(self.api_key_env)
         if not key:
             raise LLMError(f"Missing API key env var: {self.api_key_env}")
-        request = urllib.request.Request(
-            self.api_url,
-            data=json.dumps(payload).encode("utf-8"),
-            headers={"Content-Type": "application/json", "Authorization": f"Bearer {key}"},
-            method="POST",
-        )
-        context = ssl.create_default_context()
         try:
-            with urllib.request.urlopen(request, timeout=self.timeout_sec, context=context) as response:
-                raw = response.read()
-                return json.loads(raw.decode("utf-8"))
-        except urllib.error.HTTPError as err:
-            detail = ""
-            try:
-                detail = err.read().decode("utf-8")
-            except Exception:
-                detail = ""
-            raise LLMError(f"LLM HTTP error {err.code}: {detail}") from err
-        except urllib.error.URLError as err:
+            status, raw = self.session.post(
+                self.api_url,
+                body=jsonutil.dumps(payload),
+                headers={"Content-Type": "application/json", "Authorization": f"Bearer {key}"},
+                timeout=self.timeout_sec,
+            )
+        except (OSError, http.client.HTTPException) as err:
             raise LLMError(f"LLM network error: {err}") from err
+        if status >= 300:
+            raise LLMError(f"LLM HTTP error {status}: {raw.decode('utf-8', 'replace')}")
+        try:
+            data = jsonutil.loads(raw)
         except Exception as err:
             raise LLMError(f"LLM request failed: {err}") from err
+        if cache_path is not None:
+            self._cache_store(cache_path, raw)
+        return data
 
 
 class AnthropicHTTPClient(BaseLLMClient):
@@ -77,10 +338,25 @@ class AnthropicHTTPClient(BaseLLMClient):
         api_key_env: str = "ANTHROPIC_API_KEY",
         timeout_sec: int = 30,
         api_url: str = "https://api.anthropic.com/v1/messages",
+        session: HTTPSession | None = None,
+        max_concurrency: int = 32,
+        cache_dir: str | None = None,
     ):
-        super().__init__(api_url, api_key_env=api_key_env, timeout_sec=timeout_sec)
+        super().__init__(
+            api_url,
+            api_key_env=api_key_env,
+            timeout_sec=timeout_sec,
+            session=session,
+            max_concurrency=max_concurrency,
+            cache_dir=cache_dir,
+        )
         self.model = model
 
+    def _build_tool_payload(
+        self, tools: list[dict[str, Any]]
+    ) -> tuple[str, list[dict[str, Any]]]:
+        return self._system_prompt(tools), [self._to_anthropic_tool(tool) for tool in tools]
+
     def _system_prompt(self, tools: list[dict[str, Any]]) -> str:
         names = [tool.get("name", "unknown") for tool in tools]
         return (
@@ -90,30 +366,38 @@ class AnthropicHTTPClient(BaseLLMClient):
 
     def complete(
         self,
-        messages: list[dict[str, str]],
+        messages: list[dict[str, Any]],
         tools: list[dict[str, Any]],
         max_turns: int = 1,
     ) -> LLMResponse:
         if max_turns < 1:
             max_turns = 1
 
-        prompt_tools = [self._to_anthropic_tool(tool) for tool in tools]
+        system_prompt, prompt_tools = self._tool_payload(tools)
+        # System messages become system blocks; cache_control markers are forwarded as-is.
+        system: list[dict[str, Any]] = [{"type": "text", "text": system_prompt}]
+        conversation: list[dict[str, Any]] = []
+        for message in messages:
+            if message.get("role") == "system":
+                system.extend(_content_blocks(message.get("content")))
+            else:
+                conversation.append(message)
         payload: dict[str, Any] = {
             "model": self.model,
             "max_tokens": 1024,
-            "system": self._system_prompt(tools),
-            "messages": messages[:max_turns],
+            "system": system,
+            "messages": conversation[:max_turns],
             "tools": prompt_tools,
         }
 
         data = self._http_post(payload)
-        content = ""
+        text_parts: list[str] = []
         tool_calls: list[ToolRequest] = []
         for block in data.get("content", []):
             if not isinstance(block, dict):
                 continue
             if block.get("type") == "text":
-                content += str(block.get("text", ""))
+                text_parts.append(str(block.get("text", "")))
             elif block.get("type") == "tool_use":
                 tool_calls.append(
                     ToolRequest(
@@ -122,7 +406,7 @@ class AnthropicHTTPClient(BaseLLMClient):
                     )
                 )
         return LLMResponse(
-            content=content.strip(),
+            content="".join(text_parts).strip(),
             tool_calls=tool_calls,
             stop_reason=data.get("stop_reason"),
         )
@@ -142,22 +426,42 @@ class OpenAIHTTPClient(BaseLLMClient):
         api_key_env: str = "OPENAI_API_KEY",
         timeout_sec: int = 30,
         api_url: str = "https://api.openai.com/v1/chat/completions",
+        session: HTTPSession | None = None,
+        max_concurrency: int = 32,
+        cache_dir: str | None = None,
     ):
-        super().__init__(api_url, api_key_env=api_key_env, timeout_sec=timeout_sec)
+        super().__init__(
+            api_url,
+            api_key_env=api_key_env,
+            timeout_sec=timeout_sec,
+            session=session,
+            max_concurrency=max_concurrency,
+            cache_dir=cache_dir,
+        )
         self.model = model
 
     def complete(
         self,
-        messages: list[dict[str, str]],
+        messages: list[dict[str, Any]],
         tools: list[dict[str, Any]],
         max_turns: int = 1,
     ) -> LLMResponse:
         if max_turns < 1:
             max_turns = 1
+        system = [
+            {"role": "system", "content": _content_text(message.get("content"))}
+            for message in messages
+            if message.get("role") == "system"
+        ]
+        conversation = [
+            {**message, "content": _content_text(message.get("content"))}
+            for message in messages
+            if message.get("role") != "system"
+        ]
         payload: dict[str, Any] = {
             "model": self.model,
-            "messages": messages[:max_turns],
-            "tools": [self._to_openai_tool(tool) for tool in tools],
+            "messages": system + conversation[:max_turns],
+            "tools": self._tool_payload(tools),
             "tool_choice": "auto",
             "max_tokens": 1024,
         }
@@ -180,6 +484,9 @@ class OpenAIHTTPClient(BaseLLMClient):
             )
         return LLMResponse(content=content.strip(), tool_calls=tool_calls, stop_reason="tool_calls")
 
+    def _build_tool_payload(self, tools: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        return [self._to_openai_tool(tool) for tool in tools]
+
     def _to_openai_tool(self, tool: dict[str, Any]) -> dict[str, Any]:
         return {
             "type": "function",
@@ -191,58 +498,89 @@ class OpenAIHTTPClient(BaseLLMClient):
         }
 
 
+def _content_blocks(content: Any) -> list[dict[str, Any]]:
+    if isinstance(content, list):
+        return content
+    return [{"type": "text", "text": str(content or "")}]
+
+
+def _content_text(content: Any) -> str:
+    if isinstance(content, list):
+        return "\n".join(
+            str(block.get("text", "")) for block in content if isinstance(block, dict)
+        )
+    return str(content or "")
+
+
 def _coerce_args(raw: Any) -> dict[str, Any]:
     if isinstance(raw, dict):
         return raw
     if isinstance(raw, str):
+        # Only a JSON object is usable; skip the parse (and the exception)
+        # for empty strings and other JSON values.
+        if not raw.lstrip().startswith("{"):
+            return {}
         try:
-            loaded = json.loads(raw)
+            loaded = jsonutil.loads(raw)
             return loaded if isinstance(loaded, dict) else {}
-        except json.JSONDecodeError:
+        except ValueError:
             return {}
     return {}
 
 
-def default_tool_schemas() -> list[dict[str, Any]]:
-    return [
-        {
-            "name": "run_command",
-            "description": "Run a safe shell command with allowlist policy.",
-            "input_schema": {
-                "type": "object",
-                "properties": {"command": {"type": "string"}},
-                "required": ["command"],
-            },
+_DEFAULT_TOOL_SCHEMAS: tuple[dict[str, Any], ...] = (
+    {
+        "name": "run_command",
+        "description": "Run a safe shell command with allowlist policy.",
+        "input_schema": {
+            "type": "object",
+            "properties": {"command": {"type": "string"}},
+            "required": ["command"],
         },
-        {
-            "name": "read_file",
-            "description": "Read a text file from an allowed path.",
-            "input_schema": {
-                "type": "object",
-                "properties": {"path": {"type": "string"}},
-                "required": ["path"],
-            },
+    },
+    {
+        "name": "read_file",
+        "description": "Read a text file from an allowed path.",
+        "input_schema": {
+            "type": "object",
+            "properties": {"path": {"type": "string"}},
+            "required": ["path"],
         },
-        {
-            "name": "write_file",
-            "description": "Write UTF-8 text to an allowed path.",
-            "input_schema": {
-                "type": "object",
-                "properties": {
-                    "path": {"type": "string"},
-                    "content": {"type": "string"},
-                },
-                "required": ["path", "content"],
+    },
+    {
+        "name": "write_file",
+        "description": "Write UTF-8 text to an allowed path.",
+        "input_schema": {
+            "type": "object",
+            "properties": {
+                "path": {"type": "string"},
+                "content": {"type": "string"},
             },
+            "required": ["path", "content"],
         },
-        {
-            "name": "run_plan",
-            "description": "Execute an ordered plan with steps.",
-            "input_schema": {
-                "type": "object",
-                "properties": {"steps": {"type": "array"}},
-                "required": ["steps"],
-            },
-        },
-    ]
+    },
+)
+
+_RUN_PLAN_SCHEMA: dict[str, Any] = {
+    "name": "run_plan",
+    "description": "Execute an ordered plan with steps.",
+    "input_schema": {
+        "type": "object",
+        "properties": {"steps": {"type": "array"}},
+        "required": ["steps"],
+    },
+}
+
+
+def default_tool_schemas(allow_run_plan: bool = False) -> list[dict[str, Any]]:
+    """Tool schemas offered to the model.
 
+    ``run_plan`` batches steps into a single call, so one failure hides its
+    siblings' results; it is only offered when ``allow_run_plan`` is set.
+    Each call returns fresh top-level dicts; the nested ``input_schema``
+    objects are shared and must not be mutated.
+    """
+    schemas = [dict(schema) for schema in _DEFAULT_TOOL_SCHEMAS]
+    if allow_run_plan:
+        schemas.append(dict(_RUN_PLAN_SCHEMA))
+    return schemas
@@ -1,20 +1,29 @@
 from __future__ import annotations
 
+import functools
 import os
+import re
 import shlex
 from pathlib import Path
+from typing import Iterable
 
 from .config import SafetyConfig
 
+_SEPARATORS = frozenset(("&&", "||", "|", ";"))
+
+# shlex.split only treats quotes and backslashes specially; without them its
+# result is the string split on shlex's whitespace characters.
+_SHLEX_SPECIAL = re.compile(r"[\"'\\]")
+_SHLEX_TOKEN = re.compile(r"[^ \t\r\n]+")
+
 
 class SecurityViolation(Exception):
     """Raised when a command or path does not satisfy the active policy."""
 
 
 class CommandPolicy:
-    def __init__(self, config: SafetyConfig):
-        self.config = config
-        self.network_executables = {
+    network_executables = frozenset(
+        {
             "curl",
             "wget",
             "nc",
@@ -25,34 +34,60 @@ class CommandPolicy:
             "scp",
             "sftp",
         }
+    )
+
+    def __init__(self, config: SafetyConfig):
+        self.config = config
+        # Frozen here so a config built with plain lists still gets O(1) lookups.
+        self._denied = frozenset(config.denied_commands)
+        self._allowed = frozenset(config.allowed_commands)
+        roots = [str(root) for root in config.resolved_roots]
+        self._root_names = frozenset(roots)
+        self._root_prefixes = tuple(
+            root if root.endswith(os.sep) else root + os.sep for root in roots
+        )
+        # Plans and queue retries repeat the same command strings; only
+        # successful validations are cached since exceptions are not.
+        self._validate_cached = functools.lru_cache(maxsize=256)(self._validate_parts)
 
     @staticmethod
-    def _normalize_command(command: str | list[str]) -> list[str]:
-        if isinstance(command, list):
-            return [str(item) for item in command if str(item).strip()]
+    def _normalize_command(command: str | tuple[str, ...]) -> tuple[str, ...]:
+        if isinstance(command, tuple):
+            return tuple(item for item in command if item.strip())
         if isinstance(command, str):
-            return shlex.split(command)
+            if _SHLEX_SPECIAL.search(command) is None:
+                return tuple(_SHLEX_TOKEN.findall(command))
+            return tuple(shlex.split(command))
         raise TypeError("Command must be a string or list of strings")
 
     def validate_command(self, command: str | list[str]) -> list[str]:
+        if isinstance(command, list):
+            command = tuple(str(item) for item in command)
+        elif not isinstance(command, str):
+            raise TypeError("Command must be a string or list of strings")
+        return list(self._validate_cached(command))
+
+    def _validate_parts(self, command: str | tuple[str, ...]) -> tuple[str, ...]:
         parts = self._normalize_command(command)
         if not parts:
             raise SecurityViolation("Empty command")
 
-        executable = os.path.basename(parts[0]).lower()
-        if executable in self.config.denied_commands:
+        executable = os.path.basename(parts[0])
+        if not executable.islower():
+            executable = executable.lower()
+        if executable in self._denied:
             raise SecurityViolation(f"Executable is denied: {executable}")
 
         if executable in self.network_executables and not self.config.network_access:
             raise SecurityViolation(f"Network executable blocked by policy: {executable}")
 
-        if self.config.allowed_commands and executable not in self.config.allowed_commands:
+        if self._allowed and executable not in self._allowed:
             raise SecurityViolation(
                 f"Executable is not allowlisted: {executable}. "
                 f"Enable by adding to allowed_commands."
             )
 
-        if "&&" in parts or "||" in parts or "|" in parts or ";" in parts:
+        if not _SEPARATORS.isdisjoint(parts):
             raise SecurityViolation("Command separators/operators are not allowed")
 
         return parts
@@ -61,14 +96,27 @@ class CommandPolicy:
         candidate = Path(path)
         if base is not None and not candidate.is_absolute():
             candidate = Path(base) / candidate
-        target = candidate.resolve()
-        for root in self.config.allowed_roots:
-            allowed_root = Path(root).resolve()
-            try:
-                target.relative_to(allowed_root)
-                return target
-            except ValueError:
-                continue
+        return self._check_root(candidate.resolve())
+
+    def validate_paths(
+        self, paths: Iterable[str | Path], base: str | Path | None = None
+    ) -> list[Path]:
+        """Validate many paths relative to one ``base`` in a single pass."""
+        base_path = Path(base) if base is not None else None
+        targets = []
+        for path in paths:
+            candidate = Path(path)
+            if base_path is not None and not candidate.is_absolute():
+                candidate = base_path / candidate
+            targets.append(self._check_root(candidate.resolve()))
+        return targets
+
+    def _check_root(self, target: Path) -> Path:
+        # ``target`` is resolved, so a plain prefix test on the string is
+        # exact; the trailing separator keeps /srv/app from matching /srv/apple.
+        name = str(target)
+        if name in self._root_names or name.startswith(self._root_prefixes):
+            return target
         raise SecurityViolation(
             f"Path is outside allowed roots: {target}. "
             f"Allowed roots: {', '.join(self.config.allowed_roots)}"
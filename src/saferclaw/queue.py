@@ -1,15 +1,98 @@
 from __future__ import annotations
 
-import json
 import sqlite3
+import time
+from contextlib import contextmanager
 from dataclasses import dataclass
-from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Iterable, Iterator
+
+from . import jsonutil
+from .policy import SecurityViolation
+
+# Keep IN (...) lists well below SQLITE_MAX_VARIABLE_NUMBER on old builds.
+_MAX_IN_PARAMS = 500
+
+# UPDATE ... RETURNING needs SQLite 3.35 (Debian bullseye ships 3.34).
+_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+# Statements live at module level so every call reuses the same string and
+# hits sqlite3's per-connection statement cache.
+_SQL_INSERT = """
+INSERT INTO jobs(kind, status, payload, attempts, max_attempts, created_at, updated_at)
+VALUES (?, "queued", ?, 0, ?, ?, ?)
+"""
+
+_SQL_CLAIM = """
+UPDATE jobs
+SET status = "running", updated_at = ?, attempts = attempts + 1
+WHERE id = (
+    SELECT id FROM jobs
+    WHERE status = "queued" AND id > ?
+    ORDER BY id ASC
+    LIMIT 1
+)
+RETURNING *
+"""
+
+_SQL_NEXT_QUEUED = """
+SELECT id FROM jobs
+WHERE status = "queued" AND id > ?
+ORDER BY id ASC
+LIMIT 1
+"""
+
+_SQL_CLAIM_ID = """
+UPDATE jobs
+SET status = "running", updated_at = ?, attempts = attempts + 1
+WHERE id = ?
+"""
+
+_SQL_SELECT_ID = "SELECT * FROM jobs WHERE id = ?"
+
+_SQL_MARK_DONE = """
+UPDATE jobs
+SET status = "done", updated_at = ?, result_json = ?, error = NULL
+WHERE id = ?
+"""
+
+_SQL_MARK_FAILED = """
+UPDATE jobs
+SET status = CASE WHEN ? AND attempts < max_attempts THEN "queued" ELSE "failed" END,
+    updated_at = ?, error = ?
+WHERE id IN ({placeholders})
+"""
+
+_SQL_MARK_BLOCKED = """
+UPDATE jobs
+SET status = "blocked", updated_at = ?, error = ?
+WHERE id = ?
+"""
+
+_SQL_LIST_ALL = "SELECT * FROM jobs ORDER BY id DESC LIMIT ?"
+
+_SQL_LIST_BY_STATUS = "SELECT * FROM jobs WHERE status = ? ORDER BY id DESC LIMIT ?"
+
+
+_second_prefix: tuple[int, str] = (-1, "")
 
 
 def _utcnow_iso() -> str:
-    return datetime.now(timezone.utc).isoformat()
+    # Same layout as datetime.now(timezone.utc).isoformat(), except that a
+    # whole second prints ".000000" where isoformat drops the fraction.
+    # Microseconds are rounded like datetime does, but clamped to 999999
+    # rather than carried into the next second. The formatted second is
+    # reused until the clock moves on, so most calls only format the
+    # microseconds.
+    global _second_prefix
+    now = time.time()
+    seconds = int(now)
+    cached = _second_prefix
+    if cached[0] != seconds:
+        cached = (seconds, time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(seconds)))
+        _second_prefix = cached
+    micros = min(round((now - seconds) * 1_000_000), 999_999)
+    return f"{cached[1]}.{micros:06d}+00:00"
 
 
 @dataclass
@@ -31,7 +114,7 @@ class Job:
             id=row["id"],
             kind=row["kind"],
             status=row["status"],
-            payload=json.loads(row["payload"]),
+            payload=jsonutil.loads(row["payload"]),
             attempts=row["attempts"],
             max_attempts=row["max_attempts"],
             created_at=row["created_at"],
@@ -41,19 +124,62 @@ class Job:
         )
 
 
+def run_job(handler: Callable[[Job], dict[str, Any]], job: Job) -> dict[str, Any]:
+    """Run ``handler`` on ``job`` and describe the outcome for ``record_outcomes``."""
+    try:
+        return {"status": "done", "job_id": job.id, "output": handler(job)}
+    except SecurityViolation as err:
+        return {"status": "blocked", "job_id": job.id, "error": str(err)}
+    except Exception as err:
+        return {"status": "failed", "job_id": job.id, "error": str(err)}
+
+
 class QueueManager:
     def __init__(self, path: str = ".saferclaw.jobs.sqlite"):
         self.path = Path(path)
         self.path.parent.mkdir(parents=True, exist_ok=True)
-        self.conn = sqlite3.connect(self.path.as_posix(), check_same_thread=False)
+        # ``timeout`` is SQLite's busy timeout: concurrent workers wait for
+        # the write lock instead of failing with "database is locked".
+        # Autocommit mode: reads never open a transaction and writers use
+        # _write() to take the write lock up front.
+        self.conn = sqlite3.connect(
+            self.path.as_posix(), timeout=5.0, check_same_thread=False, isolation_level=None
+        )
         self.conn.row_factory = sqlite3.Row
+        # WAL lets queue-list and other readers run while a worker drains jobs.
+        # With WAL, synchronous=NORMAL skips the fsync per commit; a power cut
+        # can lose the last transactions but never corrupts the database.
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA temp_store=MEMORY")
         self._ensure_schema()
 
+    def __enter__(self) -> "QueueManager":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
     def close(self) -> None:
         self.conn.close()
 
+    @contextmanager
+    def _write(self) -> Iterator[None]:
+        """Run the block in a ``BEGIN IMMEDIATE`` transaction.
+
+        Taking the write lock at BEGIN means a read inside the block (such as
+        the fallback claim's SELECT) cannot be invalidated by another writer.
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
     def _ensure_schema(self) -> None:
-        with self.conn:
+        with self._write():
             self.conn.execute(
                 """
                 CREATE TABLE IF NOT EXISTS jobs(
@@ -70,99 +196,196 @@ class QueueManager:
                 )
                 """
             )
-            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status)")
+            # claim_next and list_jobs filter on status and order by id.
+            self.conn.execute("DROP INDEX IF EXISTS idx_jobs_status")
+            self.conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_jobs_status_id ON jobs(status, id)"
+            )
             self.conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_updated ON jobs(updated_at)")
 
     def enqueue(self, kind: str, payload: dict[str, Any], max_attempts: int = 3) -> int:
         now = _utcnow_iso()
-        serialized = json.dumps(payload)
-        with self.conn:
-            cursor = self.conn.execute(
-                """
-                INSERT INTO jobs(kind, status, payload, attempts, max_attempts, created_at, updated_at)
-                VALUES (?, ?, ?, 0, ?, ?, ?)
-                """,
-                (kind, "queued", serialized, max_attempts, now, now),
-            )
+        serialized = jsonutil.dumps(payload).decode("utf-8")
+        with self._write():
+            cursor = self.conn.execute(_SQL_INSERT, (kind, serialized, max_attempts, now, now))
         return int(cursor.lastrowid)
 
-    def claim_next(self) -> Job | None:
+    def enqueue_many(self, jobs: Iterable[tuple[str, dict[str, Any], int]]) -> list[int]:
+        """Insert ``(kind, payload, max_attempts)`` jobs in one transaction.
+
+        Returns the new job ids in input order.
+        """
+        now = _utcnow_iso()
+        rows = [
+            (kind, jsonutil.dumps(payload).decode("utf-8"), max_attempts, now, now)
+            for kind, payload, max_attempts in jobs
+        ]
+        if not rows:
+            return []
+        with self._write():
+            self.conn.executemany(_SQL_INSERT, rows)
+            # The transaction holds the write lock, so the ids are contiguous.
+            last_id = self.conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+        return list(range(last_id - len(rows) + 1, last_id + 1))
+
+    def claim_next(self, after_id: int = 0) -> Job | None:
+        """Claim the oldest queued job whose id is greater than ``after_id``."""
+        if _HAS_RETURNING:
+            # One statement selects, claims and returns the row, so two workers
+            # can never claim the same job.
+            with self._write():
+                rows = self.conn.execute(_SQL_CLAIM, (_utcnow_iso(), after_id)).fetchall()
+            return Job.from_row(rows[0]) if rows else None
+
         # SQLite doesn't support skip-locked on all versions, so we use a small transaction
         # with a direct status update to claim one queued row.
-        with self.conn:
-            row = self.conn.execute(
-                """
-                SELECT id FROM jobs
-                WHERE status = "queued"
-                ORDER BY id ASC
-                LIMIT 1
-                """
-            ).fetchone()
+        with self._write():
+            row = self.conn.execute(_SQL_NEXT_QUEUED, (after_id,)).fetchone()
             if row is None:
                 return None
-            now = _utcnow_iso()
-            self.conn.execute(
-                """
-                UPDATE jobs
-                SET status = "running", updated_at = ?, attempts = attempts + 1
-                WHERE id = ?
-                """,
-                (now, row["id"]),
-            )
-            job_row = self.conn.execute(
-                "SELECT * FROM jobs WHERE id = ?",
-                (row["id"],),
-            ).fetchone()
+            self.conn.execute(_SQL_CLAIM_ID, (_utcnow_iso(), row["id"]))
+            job_row = self.conn.execute(_SQL_SELECT_ID, (row["id"],)).fetchone()
             return Job.from_row(job_row)
 
-    def mark_done(self, job_id: int, result_json: str) -> None:
-        with self.conn:
-            self.conn.execute(
-                """
-                UPDATE jobs
-                SET status = "done", updated_at = ?, result_json = ?, error = NULL
-                WHERE id = ?
-                """,
-                (_utcnow_iso(), result_json, job_id),
-            )
+    def mark_done(self, job_id: int, result: dict[str, Any]) -> None:
+        self.mark_done_many([(job_id, result)])
+
+    def mark_done_many(self, results: Iterable[tuple[int, dict[str, Any]]]) -> None:
+        """Mark several jobs done in one transaction."""
+        with self._write():
+            self._mark_done(results)
+
+    def _mark_done(self, results: Iterable[tuple[int, dict[str, Any]]]) -> None:
+        now = _utcnow_iso()
+        rows = [(now, jsonutil.dumps(result).decode("utf-8"), job_id) for job_id, result in results]
+        self.conn.executemany(_SQL_MARK_DONE, rows)
 
     def mark_failed(self, job_id: int, error: str, retryable: bool = True) -> None:
-        row = self.conn.execute(
-            "SELECT attempts, max_attempts FROM jobs WHERE id = ?",
-            (job_id,),
-        ).fetchone()
-        if row is None:
-            return
-        status = "queued" if (retryable and row["attempts"] < row["max_attempts"]) else "failed"
-        with self.conn:
+        self.mark_failed_many([job_id], error, retryable=retryable)
+
+    def mark_failed_many(self, job_ids: Iterable[int], error: str, retryable: bool = True) -> None:
+        """Mark jobs that failed for the same ``error`` in one transaction.
+
+        Each job is requeued or failed according to its own attempt count.
+        """
+        with self._write():
+            self._mark_failed(job_ids, error, retryable)
+
+    def _mark_failed(self, job_ids: Iterable[int], error: str, retryable: bool) -> None:
+        ids = list(job_ids)
+        now = _utcnow_iso()
+        for start in range(0, len(ids), _MAX_IN_PARAMS):
+            chunk = ids[start : start + _MAX_IN_PARAMS]
             self.conn.execute(
-                """
-                UPDATE jobs
-                SET status = ?, updated_at = ?, error = ?
-                WHERE id = ?
-                """,
-                (status, _utcnow_iso(), error, job_id),
+                _SQL_MARK_FAILED.format(placeholders=", ".join("?" * len(chunk))),
+                (int(retryable), now, error, *chunk),
             )
 
     def mark_blocked(self, job_id: int, reason: str) -> None:
-        with self.conn:
-            self.conn.execute(
-                """
-                UPDATE jobs
-                SET status = "blocked", updated_at = ?, error = ?
-                WHERE id = ?
-                """,
-                (_utcnow_iso(), reason, job_id),
-            )
+        self.mark_blocked_many([(job_id, reason)])
+
+    def mark_blocked_many(self, reasons: Iterable[tuple[int, str]]) -> None:
+        """Mark several jobs blocked in one transaction."""
+        with self._write():
+            self._mark_blocked(reasons)
+
+    def _mark_blocked(self, reasons: Iterable[tuple[int, str]]) -> None:
+        now = _utcnow_iso()
+        rows = [(now, reason, job_id) for job_id, reason in reasons]
+        self.conn.executemany(_SQL_MARK_BLOCKED, rows)
+
+    def record_outcomes(self, outcomes: Iterable[dict[str, Any]]) -> None:
+        """Apply job outcomes from :func:`run_job` in a single transaction.
+
+        Failed jobs are grouped by error so each distinct error is one UPDATE.
+        """
+        done: list[tuple[int, dict[str, Any]]] = []
+        blocked: list[tuple[int, str]] = []
+        failed: dict[str, list[int]] = {}
+        for outcome in outcomes:
+            if outcome["status"] == "done":
+                done.append((outcome["job_id"], outcome["output"]))
+            elif outcome["status"] == "blocked":
+                blocked.append((outcome["job_id"], outcome["error"]))
+            else:
+                failed.setdefault(outcome["error"], []).append(outcome["job_id"])
+        with self._write():
+            if done:
+                self._mark_done(done)
+            if blocked:
+                self._mark_blocked(blocked)
+            for error, job_ids in failed.items():
+                self._mark_failed(job_ids, error, retryable=True)
+
+    async def run_workers(
+        self,
+        handler: Callable[[Job], dict[str, Any]],
+        concurrency: int = 8,
+        max_jobs: int | None = None,
+        flush_every: int = 32,
+        flush_interval: float = 0.05,
+    ) -> list[dict[str, Any]]:
+        """Claim queued jobs and run ``handler`` on up to ``concurrency`` at once.
+
+        Handlers run in worker threads. Claims and status updates stay on the
+        event loop thread; outcomes are buffered and written in one
+        transaction every ``flush_every`` jobs or ``flush_interval`` seconds.
+        Stops when the queue is empty or ``max_jobs`` jobs were claimed.
+        Each job is claimed at most once per call: a job that fails and is
+        requeued waits for the next call. Returns the outcomes in completion order.
+        """
+        import asyncio
+
+        concurrency = max(1, concurrency)
+        # A one-slot hand-off: jobs are claimed only when a worker is about to
+        # become free, so few rows sit in "running" without being worked on.
+        jobs: asyncio.Queue[Job | None] = asyncio.Queue(maxsize=1)
+        pending: list[dict[str, Any]] = []
+        outcomes: list[dict[str, Any]] = []
+
+        def flush() -> None:
+            if pending:
+                self.record_outcomes(pending)
+                outcomes.extend(pending)
+                pending.clear()
+
+        async def worker() -> None:
+            while (job := await jobs.get()) is not None:
+                pending.append(await asyncio.to_thread(run_job, handler, job))
+                if len(pending) >= flush_every:
+                    flush()
+
+        async def flush_periodically() -> None:
+            while True:
+                await asyncio.sleep(flush_interval)
+                flush()
+
+        workers = [asyncio.create_task(worker()) for _ in range(concurrency)]
+        flusher = asyncio.create_task(flush_periodically())
+        try:
+            claimed = 0
+            # Claims go in id order, so only ids past the last claim are new to
+            # this run; a job requeued by the flusher is left for the next one.
+            last_id = 0
+            while max_jobs is None or claimed < max_jobs:
+                job = self.claim_next(after_id=last_id)
+                if job is None:
+                    break
+                claimed += 1
+                last_id = job.id
+                await jobs.put(job)
+            for _ in workers:
+                await jobs.put(None)
+            await asyncio.gather(*workers)
+        finally:
+            for task in (*workers, flusher):
+                task.cancel()
+            flush()
+        return outcomes
 
     def list_jobs(self, status: str | None = None, limit: int = 50) -> list[Job]:
-        query = "SELECT * FROM jobs"
-        params: list[Any] = []
         if status:
-            query += " WHERE status = ?"
-            params.append(status)
-        query += " ORDER BY id DESC LIMIT ?"
-        params.append(limit)
-        rows = self.conn.execute(query, params).fetchall()
+            rows = self.conn.execute(_SQL_LIST_BY_STATUS, (status, limit)).fetchall()
+        else:
+            rows = self.conn.execute(_SQL_LIST_ALL, (limit,)).fetchall()
         return [Job.from_row(row) for row in rows]
-
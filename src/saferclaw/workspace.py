@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import functools
+import os
+from collections import OrderedDict
 from pathlib import Path
 
 PROFILE_FILES = [
@@ -13,50 +16,109 @@ PROFILE_FILES = [
     "MEMORY.md",
 ]
 
+# Workspace root -> {file path: ((mtime_ns, size), stripped content)} for the
+# files found by that root's latest scan. Only the most recently loaded
+# roots are kept, like the context text cache below.
+_PROFILE_CACHE: OrderedDict[str, dict[str, tuple[tuple[int, int], str]]] = OrderedDict()
+_PROFILE_CACHE_ROOTS = 8
+
+
+def _profile_entries(root: Path) -> list[tuple[str, os.DirEntry[str]]]:
+    """Profile files under ``root`` as ``(profile key, entry)``, in context order.
+
+    One ``scandir`` per directory replaces an exists/is_file stat pair per
+    candidate file.
+    """
+    try:
+        with os.scandir(root) as scan:
+            entries = {entry.name: entry for entry in scan}
+    except (FileNotFoundError, NotADirectoryError):
+        raise FileNotFoundError(f"Workspace not found: {root}") from None
+
+    found = [
+        (filename, entries[filename])
+        for filename in PROFILE_FILES
+        if filename in entries and entries[filename].is_file()
+    ]
+
+    memory_dir = entries.get("memory")
+    if memory_dir is not None and memory_dir.is_dir():
+        with os.scandir(memory_dir.path) as scan:
+            notes = sorted(
+                (entry for entry in scan if entry.name.endswith(".md") and entry.is_file()),
+                key=lambda entry: entry.name,
+            )
+        found.extend((f"MEMORY:{entry.name}", entry) for entry in notes)
+    return found
+
 
 def load_workspace_profiles(workspace_dir: str | None) -> dict[str, str]:
     root = Path(workspace_dir or ".").resolve()
-    if not root.exists():
-        raise FileNotFoundError(f"Workspace not found: {root}")
-
     profiles: dict[str, str] = {}
-    for filename in PROFILE_FILES:
-        path = root / filename
-        if path.exists() and path.is_file():
-            content = path.read_text(encoding="utf-8").strip()
-            if content:
-                profiles[filename] = content
-
-    memory_dir = root / "memory"
-    if memory_dir.exists() and memory_dir.is_dir():
-        entries = sorted(memory_dir.glob("*.md"))
-        for path in entries:
-            content = path.read_text(encoding="utf-8").strip()
-            if content:
-                profiles[f"MEMORY:{path.name}"] = content
-
+    previous = _PROFILE_CACHE.pop(str(root), {})
+    # Rebuilt from this scan, so files that were removed drop out.
+    current: dict[str, tuple[tuple[int, int], str]] = {}
+    for key, entry in _profile_entries(root):
+        stat = entry.stat()
+        version = (stat.st_mtime_ns, stat.st_size)
+        cached = previous.get(entry.path)
+        if cached is not None and cached[0] == version:
+            content = cached[1]
+        else:
+            with open(entry.path, encoding="utf-8") as handle:
+                content = handle.read().strip()
+        current[entry.path] = (version, content)
+        if content:
+            profiles[key] = content
+    _PROFILE_CACHE[str(root)] = current
+    if len(_PROFILE_CACHE) > _PROFILE_CACHE_ROOTS:
+        _PROFILE_CACHE.popitem(last=False)
     return profiles
 
 
+def _profile_mtimes(root: Path) -> tuple[tuple[str, int, int], ...]:
+    """Modification time and size of every file that contributes to the context."""
+    return tuple(
+        (key, entry.stat().st_mtime_ns, entry.stat().st_size)
+        for key, entry in _profile_entries(root)
+    )
+
+
+@functools.lru_cache(maxsize=8)
+def _cached_context_text(root: str, mtimes: tuple[tuple[str, int, int], ...]) -> str:
+    # ``mtimes`` is only part of the cache key: any edit, addition or removal
+    # of a profile file produces a new key and a fresh read.
+    return _render_context(load_workspace_profiles(root))
+
+
 def workspace_context_text(
     workspace_dir: str | None,
     extra: dict[str, str] | None = None,
 ) -> str:
+    if workspace_dir and not extra:
+        root = Path(workspace_dir).resolve()
+        return _cached_context_text(str(root), _profile_mtimes(root))
+
     profiles = load_workspace_profiles(workspace_dir) if workspace_dir else {}
     if extra:
         for key, value in extra.items():
             if value is not None:
                 profiles[key] = value
+    return _render_context(profiles)
+
+
+def _render_context(profiles: dict[str, str]) -> str:
     if not profiles:
         return ""
 
-    parts: list[str] = []
-    for key in PROFILE_FILES:
-        value = profiles.get(key)
-        if value:
-            parts.append(f"## {key}\n\n{value}")
-
-    for key in sorted(name for name in profiles if name.startswith("MEMORY:")):
-        parts.append(f"## {key}\n\n{profiles[key]}")
+    sections = [(key, profiles.get(key)) for key in PROFILE_FILES]
+    memory_keys = sorted(name for name in profiles if name.startswith("MEMORY:"))
+    sections.extend((key, profiles[key]) for key in memory_keys)
 
-    return "\n\n".join(parts)
+    # Collect the pieces and join once, so no per-section string is built and
+    # each profile's text is copied only into the final result.
+    pieces: list[str] = []
+    for key, value in sections:
+        if value or key.startswith("MEMORY:"):
+            pieces += ("\n\n## " if pieces else "## ", key, "\n\n", value or "")
+    return "".join(pieces)